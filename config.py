@@ -1,6 +1,7 @@
 # config.py
 
 import os, yaml, logging
+from pathlib import Path
 from dotenv import load_dotenv
 from google.cloud import firestore
 import google.auth
@@ -31,6 +32,10 @@ config = Config()
 ENV = os.getenv("APP_ENV", "production").lower()
 SNAPSHOT_ENABLED = (os.getenv("SNAPSHOT_ENABLED","false").lower()=="true") or ENV in ("development","local")
 
+# Хранилище истории и окон свечей: локально — SQLite и файлы в HISTORY_DIR, иначе Firestore
+USE_FILE_STORAGE = ENV in ("development", "local")
+HISTORY_DIR = Path("history")
+
 def setup_logging(cfg):
     logger = logging.getLogger('ChartGenius2')
     if not logger.handlers:
@@ -1,13 +1,19 @@
 # dash_app/callbacks.py
 
-import pandas as pd
-from dash import Input, Output, State, callback_context, dcc, html
+from datetime import datetime
+
+from dash import Input, Output, State, callback_context, dcc, html, no_update
 from dash.exceptions import PreventUpdate
 
 from dash_app import create_dash_app  # НЕ из app.py
-from services.analysis_service import analyze_data
-from services.history_manager import save_history, get_history
-from services.crypto_compare_provider import CryptoCompareProvider
+from models.data_models import OhlcvFrame
+from services.analysis_service import SECTION_TO_GROUP, analyze_sections, select_sections
+from services.candle_store import get_window
+from services.history_manager import save_history, list_history, get_history_result
+from services.hedged_provider import get_provider
+from services.ohlcv_provider import OhlcvProvider
+from services.live_feed import feed
+from visualization.live import candle_patch, candle_replacement, store_patch
 from visualization.visualizer import create_chart, prepare_explanations
 
 from flask import request as flask_request
@@ -21,6 +27,7 @@ dash_app = create_dash_app(flask_app)  # Получаем тот же экзем
         Output('stored-analysis','data'),
         Output('main-chart','figure'),
         Output('explanations','children'),
+        Output('live-cursor','data'),
     ],
     [
         Input('button-analyze','n_clicks'),
@@ -50,27 +57,40 @@ async def update_output(n1, n2, concl, basic, adv, tech, vol,
     selected = concl + basic + adv + tech + vol
 
     if triggered == 'button-analyze' and n1:
-        # Шаг 1: анализ через OpenAI и CryptoCompare
-        result = await analyze_data(user, sym, intrvl, int(ncand))
-        if 'error' in result:
-            return dash_app.no_update, dash_app.no_update, dash_app.no_update, [html.Div(result['error'])]
-        df = await CryptoCompareProvider().fetch_ohlcv(sym, intrvl, int(ncand))
-        save_history(user, sym, intrvl, result)
+        # Шаг 1: свечи загружаются один раз и идут и в график, и в промпт
+        df = await get_provider().fetch_ohlcv(sym, intrvl, int(ncand))
+        if df.empty:
+            return no_update, no_update, no_update, [html.Div("Нет данных для анализа")], no_update
+        records = df.to_records()
+        # Шаг 2: параллельный анализ только выбранных секций
+        result, failed = await analyze_sections(user, records, select_sections(selected))
+        if not result:
+            return no_update, no_update, no_update, [html.Div("Анализ не удался.")], no_update
+        save_history(user, sym, intrvl, result, candles=df)
         fig = create_chart(selected, df, result)
         expl = prepare_explanations(selected, result)
-        children = [html.H5(e['Название']) for e in expl] + [dcc.Markdown(e['Текст']) for e in expl]
-        return df.to_dict('records'), result, fig, children
+        children = _failed_notice(failed) + [html.H5(e['Название']) for e in expl] + [dcc.Markdown(e['Текст']) for e in expl]
+        return df.to_columns(), result, fig, children, _live_cursor(sym, intrvl, df)
 
     if triggered == 'button-analyze-loaded' and n2:
-        history = get_history(user)
-        if not history:
-            return dash_app.no_update, dash_app.no_update, dash_app.no_update, [html.Div("История пуста.")]
-        last = history[-1]
-        df = await CryptoCompareProvider().fetch_ohlcv(last['symbol'], last['interval'], int(ncand))
+        # Листинг отдаёт только метаданные; result читается для одной записи
+        history, _ = list_history(user, limit=1)
+        last = history[0] if history else None
+        if last is not None:
+            last['result'] = get_history_result(user, last['id'])
+        if last is None or last['result'] is None:
+            return no_update, no_update, no_update, [html.Div("История пуста.")], no_update
+        # Окно свечей, на котором делался анализ; для старых записей — повторная загрузка
+        df = get_window(last['candles']) if last.get('candles') else None
+        if df is None:
+            df = await get_provider().fetch_ohlcv(last['symbol'], last['interval'], int(ncand))
         fig = create_chart(selected, df, last['result'])
         expl = prepare_explanations(selected, last['result'])
         children = [html.H5(e['Название']) for e in expl] + [dcc.Markdown(e['Текст']) for e in expl]
-        return df.to_dict('records'), last['result'], fig, children
+        # Live-режим только если окно доходит до текущей свечи, иначе свежие
+        # свечи приклеились бы к историческому окну
+        cursor = _live_cursor(last['symbol'], last['interval'], df) if _is_current(df, last['interval']) else None
+        return df.to_columns(), last['result'], fig, children, cursor
 
     # Обновление графика при переключении чеклистов
     checklist_ids = {
@@ -79,10 +99,92 @@ async def update_output(n1, n2, concl, basic, adv, tech, vol,
         'checklist-volume'
     }
     if triggered in checklist_ids and stored_data and stored_analysis:
-        df = pd.DataFrame(stored_data)
+        # Дозапрашиваем только секции, которых ещё нет в stored-analysis
+        df = OhlcvFrame.from_columns(stored_data)
+        missing = [s for s in selected if s in SECTION_TO_GROUP and s not in stored_analysis]
+        failed = []
+        if missing:
+            extra, failed = await analyze_sections(user, df.to_records(), missing)
+            stored_analysis = {**stored_analysis, **extra}
         fig = create_chart(selected, df, stored_analysis)
         expl = prepare_explanations(selected, stored_analysis)
-        children = [html.H5(e['Название']) for e in expl] + [dcc.Markdown(e['Текст']) for e in expl]
-        return stored_data, stored_analysis, fig, children
+        children = _failed_notice(failed) + [html.H5(e['Название']) for e in expl] + [dcc.Markdown(e['Текст']) for e in expl]
+        return stored_data, stored_analysis, fig, children, no_update
 
     raise PreventUpdate
+
+
+def _failed_notice(failed):
+    """
+    Предупреждение о секциях, которые LLM не вернула или не смогла сформировать.
+    """
+    if not failed:
+        return []
+    return [html.Div(f"Не удалось получить разделы: {', '.join(failed)}", className='text-warning mb-2')]
+
+def _is_current(df, interval):
+    """
+    True, если последняя свеча окна — текущая или только что закрытая.
+    """
+    if df.empty:
+        return False
+    age = (datetime.utcnow() - df.open_time(-1)).total_seconds()
+    return age < 2 * OhlcvProvider.interval_seconds(interval)
+
+def _live_cursor(symbol, interval, df):
+    """
+    Положение графика для live-режима: пара, время последней свечи и число свечей.
+    """
+    if df.empty:
+        return None
+    return {
+        'symbol': symbol,
+        'interval': interval,
+        'last_time': df.open_time(-1).strftime('%Y-%m-%dT%H:%M:%S'),
+        'length': len(df),
+    }
+
+@dash_app.callback(
+    Output('live-interval','disabled'),
+    Input('checklist-live','value'),
+)
+def toggle_live(live):
+    return 'live' not in (live or [])
+
+@dash_app.callback(
+    [
+        Output('main-chart','figure', allow_duplicate=True),
+        Output('stored-data','data', allow_duplicate=True),
+        Output('live-cursor','data', allow_duplicate=True),
+    ],
+    Input('live-interval','n_intervals'),
+    State('live-cursor','data'),
+    prevent_initial_call=True,
+)
+async def stream_candles(_, cursor):
+    """
+    Дописывает в график только изменившиеся свечи из общего live-фида:
+    последняя свеча заменяется по индексу, новые добавляются в конец.
+    Если разрыв с фидом закрыть не удалось, свечной ряд заменяется целиком.
+    Индикаторные трассы строятся по результату LLM и между тиками не меняются.
+    """
+    if not cursor:
+        raise PreventUpdate
+    updates = await feed.fetch_since(cursor['symbol'], cursor['interval'], cursor['last_time'])
+    if updates is None:
+        return await _rebuild_candles(cursor)
+    if not updates:
+        raise PreventUpdate
+
+    fig, length = candle_patch(updates, cursor['last_time'], cursor['length'])
+    data = store_patch(updates, cursor['last_time'], cursor['length'])
+    return fig, data, {**cursor, 'last_time': updates[-1]['Open Time'], 'length': length}
+
+async def _rebuild_candles(cursor):
+    """
+    Заново загружает последние `length` свечей и подменяет свечной ряд целиком.
+    """
+    df = await get_provider().fetch_ohlcv(cursor['symbol'], cursor['interval'], cursor['length'])
+    if df.empty:
+        raise PreventUpdate
+    return candle_replacement(df.to_records()), df.to_columns(), _live_cursor(cursor['symbol'], cursor['interval'], df)
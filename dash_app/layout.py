@@ -6,6 +6,8 @@ from dash import dcc, html
 layout = dbc.Container([
     dcc.Store(id='stored-data'),
     dcc.Store(id='stored-analysis'),
+    dcc.Store(id='live-cursor'),
+    dcc.Interval(id='live-interval', interval=5000, disabled=True),
 
     dbc.Row(dbc.Col(html.H3('ChartGenius2'), width=12)),
 
@@ -15,7 +17,11 @@ layout = dbc.Container([
             dbc.Input(id='input-interval', placeholder='Интервал', type='text', value='4h', className='mb-2'),
             dbc.Input(id='input-num-candles', placeholder='Кол-во свечей', type='number', value=144, className='mb-2'),
             dbc.Button('Собрать и Анализировать', id='button-analyze', color='primary', className='me-2 mb-2'),
-            dbc.Button('Анализировать из истории', id='button-analyze-loaded', color='secondary')
+            dbc.Button('Анализировать из истории', id='button-analyze-loaded', color='secondary', className='mb-2'),
+            dbc.Checklist(
+                options=[{'label':'Live','value':'live'}],
+                value=[], id='checklist-live', switch=True
+            ),
         ], width=3),
 
         dbc.Col([
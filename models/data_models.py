@@ -1,16 +1,142 @@
 # models/data_models.py
 
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
+import numpy as np
 from pydantic import BaseModel
 
-class OhlcRecord(BaseModel):
-    open_time: datetime
-    open: float
-    high: float
-    low: float
-    close: float
-    volume: float
+TIME_COLUMN = "Open Time"
+VALUE_COLUMNS = ("Open", "High", "Low", "Close", "Volume", "Quote Asset Volume")
+COLUMNS = (TIME_COLUMN,) + VALUE_COLUMNS
+
+class OhlcvFrame:
+    """
+    Колоночное представление свечей поверх непрерывных массивов NumPy.
+
+    Время хранится в `datetime64[s]`, значения — в одном массиве float64 формы
+    (len(VALUE_COLUMNS), capacity): каждая колонка — непрерывная строка, поэтому
+    `frame['Close']`, срезы и `to_pandas()` отдают представления без копирования.
+    Запасная ёмкость делает `append` амортизированно дешёвым.
+    """
+    __slots__ = ("_time", "_values", "_size")
+
+    def __init__(self, time: np.ndarray, values: np.ndarray, size: int = None):
+        self._time = time
+        self._values = values
+        self._size = len(time) if size is None else size
+
+    @classmethod
+    def empty_frame(cls) -> "OhlcvFrame":
+        return cls(np.empty(0, dtype="datetime64[s]"), np.empty((len(VALUE_COLUMNS), 0)))
+
+    @classmethod
+    def from_records(cls, records: List[dict]) -> "OhlcvFrame":
+        """
+        Строит фрейм из списка записей вида `to_records()` (stored-data, снепшоты).
+        """
+        if not records:
+            return cls.empty_frame()
+        time = np.array([r[TIME_COLUMN] for r in records], dtype="datetime64[s]")
+        values = np.array([[r[c] for c in VALUE_COLUMNS] for r in records], dtype=np.float64)
+        return cls(time, np.ascontiguousarray(values.T))
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, list]) -> "OhlcvFrame":
+        """
+        Строит фрейм из колоночного словаря вида `to_columns()` (dcc.Store).
+        """
+        time = np.array(columns[TIME_COLUMN], dtype="datetime64[s]")
+        values = np.array([columns[c] for c in VALUE_COLUMNS], dtype=np.float64)
+        return cls(time, values.reshape(len(VALUE_COLUMNS), len(time)))
+
+    @property
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._size)
+            if step != 1:
+                raise ValueError("OhlcvFrame поддерживает только срезы с шагом 1")
+            time = self._time[start:stop]
+            return OhlcvFrame(time, self._values[:, start:stop], len(time))
+        if key == TIME_COLUMN:
+            return self._time[:self._size]
+        try:
+            return self._values[VALUE_COLUMNS.index(key), :self._size]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def open_time(self, index: int) -> datetime:
+        return self["Open Time"][index].item()
+
+    def append(self, other: "OhlcvFrame") -> "OhlcvFrame":
+        """
+        Дописывает свечи `other` на месте. Если ёмкости не хватает (в том числе
+        у срезов, которые делят буфер с родителем), буферы удваиваются.
+        """
+        n, m = self._size, len(other)
+        if n + m > len(self._time):
+            capacity = max(2 * len(self._time), n + m, 16)
+            time = np.empty(capacity, dtype="datetime64[s]")
+            values = np.empty((len(VALUE_COLUMNS), capacity))
+            time[:n] = self._time[:n]
+            values[:, :n] = self._values[:, :n]
+            self._time, self._values = time, values
+        self._time[n:n + m] = other["Open Time"]
+        self._values[:, n:n + m] = other._values[:, :m]
+        self._size = n + m
+        return self
+
+    def to_bytes(self) -> bytes:
+        """
+        Компактная бинарная форма: число свечей, время (секунды) и колонки
+        значений подряд, little-endian. Обратная операция — `from_bytes`.
+        """
+        n = self._size
+        return (np.array([n], dtype="<i8").tobytes()
+                + self["Open Time"].astype("<i8").tobytes()
+                + np.ascontiguousarray(self._values[:, :n], dtype="<f8").tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "OhlcvFrame":
+        """
+        Восстанавливает фрейм из `to_bytes()`; значения — представление над `data`
+        (только для чтения, `append` переносит их в новый буфер).
+        """
+        n = int(np.frombuffer(data, dtype="<i8", count=1)[0])
+        time = np.frombuffer(data, dtype="<i8", count=n, offset=8).astype("datetime64[s]")
+        values = np.frombuffer(data, dtype="<f8", count=len(VALUE_COLUMNS) * n, offset=8 + 8 * n)
+        return cls(time, values.reshape(len(VALUE_COLUMNS), n))
+
+    def to_pandas(self):
+        """
+        DataFrame с колонками COLUMNS; колонки значений — представления буфера.
+        """
+        import pandas as pd
+        df = pd.DataFrame(self._values[:, :self._size].T, columns=list(VALUE_COLUMNS), copy=False)
+        df.insert(0, TIME_COLUMN, self["Open Time"])
+        return df
+
+    def to_columns(self) -> Dict[str, list]:
+        """
+        JSON-совместимый колоночный словарь для dcc.Store: по списку на колонку.
+        """
+        columns = {TIME_COLUMN: np.datetime_as_string(self["Open Time"], unit="s").tolist()}
+        for i, name in enumerate(VALUE_COLUMNS):
+            columns[name] = self._values[i, :self._size].tolist()
+        return columns
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        JSON-совместимые построчные записи для промпта; время — ISO-строка.
+        """
+        times = np.datetime_as_string(self["Open Time"], unit="s").tolist()
+        rows = self._values[:, :self._size].T.tolist()
+        return [dict(zip(COLUMNS, (t, *row))) for t, row in zip(times, rows)]
 
 class HistoryEntry(BaseModel):
     timestamp: datetime
@@ -1,32 +1,119 @@
 # services/analysis_service.py
 
+import asyncio
+import hashlib
 import json
+from collections import OrderedDict
 from pathlib import Path
+from typing import Dict, List, Tuple
 from jinja2 import Template
-from services.crypto_compare_provider import CryptoCompareProvider
+from config import config, logger
 from services.openai_client     import ask
 from services.snapshot_manager  import save_snapshot
 
 PROMPT_PATH = Path("prompt.txt")
-provider = CryptoCompareProvider()
 
-async def analyze_data(user_id: str, symbol: str, interval: str, limit: int = 144) -> dict:
+# Независимые группы секций анализа: каждая запрашивается отдельным вызовом LLM.
+# Значения совпадают с value чеклистов в dash_app/layout.py.
+SECTION_GROUPS: Dict[str, List[str]] = {
+    "indicators": [
+        "primary_analysis", "confidence_in_trading_decisions", "indicator_correlations",
+        "volatility_by_intervals", "market_cycles_identification", "extended_ichimoku_analysis",
+        "RSI", "MACD", "OBV", "ATR", "Stochastic_Oscillator", "ADX",
+        "Bollinger_Bands", "Ichimoku_Cloud", "Parabolic_SAR", "VWAP", "Moving_Average_Envelopes",
+    ],
+    "levels": [
+        "support_resistance_levels", "trend_lines", "fibonacci_analysis", "psychological_levels",
+        "imbalances", "unfinished_zones", "fair_value_gaps", "gap_analysis", "structural_edge",
+    ],
+    "patterns": [
+        "elliott_wave_analysis", "candlestick_patterns", "divergence_analysis", "anomalous_candles",
+    ],
+    "recommendations": ["price_prediction", "recommendations"],
+}
+SECTION_TO_GROUP = {s: g for g, sections in SECTION_GROUPS.items() for s in sections}
+# Бюджет ответа растёт с числом запрошенных секций группы
+SECTION_MAX_TOKENS = int(config.get("openai", "section_max_tokens", 500))
+MIN_GROUP_TOKENS = 1000
+MAX_GROUP_TOKENS = 15000
+
+# Кэш готовых секций: (хеш свечей, секция) -> результат
+CACHE_SIZE = 512
+# Отметка «модель не вернула секцию», чтобы не перезапрашивать её на каждом переключении
+MISSING = object()
+_section_cache: "OrderedDict[tuple, object]" = OrderedDict()
+
+def select_sections(selected: List[str]) -> List[str]:
     """
-    Собирает OHLCV через CryptoCompare, формирует промпт, сохраняет снепшот (если включён)
-    и отправляет промпт в ChatGPT, возвращая результат.
+    Оставляет из выбранных элементов чеклистов только секции LLM-анализа.
+    Если ничего не выбрано — запрашиваются все секции.
     """
-    # 1) Получаем данные
-    df = await provider.fetch_ohlcv(symbol, interval, limit)
-    if df.empty:
-        return {"error": "Нет данных для анализа"}
+    sections = [s for s in selected if s in SECTION_TO_GROUP]
+    return sections or list(SECTION_TO_GROUP)
+
+def group_max_tokens(num_sections: int) -> int:
+    return min(max(SECTION_MAX_TOKENS * num_sections, MIN_GROUP_TOKENS), MAX_GROUP_TOKENS)
 
-    # 2) Готовим промпт
-    records = df.to_dict(orient="records")
+def _render_prompt(ohlc_json: str, sections: List[str]) -> str:
     tpl = Template(PROMPT_PATH.read_text(encoding="utf-8"))
-    prompt_str = tpl.render(ohlc_data=json.dumps(records, ensure_ascii=False))
+    return tpl.render(ohlc_data=ohlc_json, sections=sections)
+
+def _cache_get(key):
+    if key in _section_cache:
+        _section_cache.move_to_end(key)
+        return True, _section_cache[key]
+    return False, None
+
+def _cache_put(key, value):
+    _section_cache[key] = value
+    _section_cache.move_to_end(key)
+    while len(_section_cache) > CACHE_SIZE:
+        _section_cache.popitem(last=False)
+
+async def analyze_sections(user_id: str, records: List[dict],
+                           sections: List[str]) -> Tuple[dict, List[str]]:
+    """
+    Запрашивает у LLM только недостающие `sections` для переданных свечей.
+    Секции группируются по SECTION_GROUPS, группы запрашиваются параллельно,
+    готовые секции берутся из кэша. Возвращает (секция -> результат,
+    список секций, которые получить не удалось).
+    """
+    ohlc_json = json.dumps(records, ensure_ascii=False)
+    digest = hashlib.sha1(ohlc_json.encode("utf-8")).hexdigest()
+
+    result, failed, missing = {}, [], {}
+    for section in sections:
+        hit, value = _cache_get((digest, section))
+        if hit:
+            if value is MISSING:
+                failed.append(section)
+            else:
+                result[section] = value
+        elif section in SECTION_TO_GROUP:
+            missing.setdefault(SECTION_TO_GROUP[section], []).append(section)
+    if not missing:
+        return result, failed
+
+    prompts = {group: _render_prompt(ohlc_json, secs) for group, secs in missing.items()}
+    save_snapshot(user_id, records, "\n\n---\n\n".join(prompts.values()))
+
+    groups = list(prompts)
+    answers = await asyncio.gather(*(
+        ask(prompts[g], max_tokens=group_max_tokens(len(missing[g]))) for g in groups
+    ))
 
-    # 3) Сохраняем снепшот для отладки
-    save_snapshot(user_id, records, prompt_str)
+    for group, answer in zip(groups, answers):
+        if "error" in answer:
+            # Сбой запроса (обрезанный JSON, сеть) не кэшируется — можно повторить
+            logger.error(f"Группа {group}: {answer['error']}")
+            failed.extend(missing[group])
+            continue
+        for section in missing[group]:
+            if section in answer:
+                _cache_put((digest, section), answer[section])
+                result[section] = answer[section]
+            else:
+                _cache_put((digest, section), MISSING)
+                failed.append(section)
 
-    # 4) Отправляем в OpenAI
-    return await ask(prompt_str)
+    return result, failed
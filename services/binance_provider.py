@@ -0,0 +1,42 @@
+# services/binance_provider.py
+
+import httpx
+import numpy as np
+from config import logger
+from models.data_models import OhlcvFrame
+from services.ohlcv_provider import OhlcvProvider, register_provider
+
+INTERVALS = {"1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d"}
+
+@register_provider
+class BinanceProvider(OhlcvProvider):
+    name = "binance"
+    BASE_URL = "https://api.binance.com/api/v3"
+
+    async def fetch_ohlcv(self, symbol: str, interval: str, limit: int) -> OhlcvFrame:
+        """
+        Загружает OHLCV данные из публичного klines-API Binance (ключ не нужен).
+        Аргументы — как у CryptoCompareProvider.fetch_ohlcv.
+        """
+        base, quote = self.parse_symbol(symbol)
+        unit, value = self.parse_interval(interval)
+        if f"{value}{unit}" not in INTERVALS:
+            raise ValueError(f"Unsupported interval: {interval}")
+
+        params = {"symbol": base + quote, "interval": f"{value}{unit}", "limit": limit}
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            resp = await client.get(f"{self.BASE_URL}/klines", params=params)
+            if resp.status_code == 400:
+                # Binance отвечает 400 на неизвестную пару — это ошибка запроса, а не источника
+                raise ValueError(f"Binance: {resp.text}")
+            resp.raise_for_status()
+            data = resp.json()
+
+        if not data:
+            logger.warning("Binance вернул пустой список свечей")
+            return OhlcvFrame.empty_frame()
+
+        # [open_time_ms, open, high, low, close, volume, close_time, quote_volume, ...]
+        time = np.fromiter((k[0] // 1000 for k in data), dtype=np.int64, count=len(data))
+        values = np.array([[k[1], k[2], k[3], k[4], k[5], k[7]] for k in data], dtype=np.float64)
+        return OhlcvFrame(time.astype("datetime64[s]"), np.ascontiguousarray(values.T))
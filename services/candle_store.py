@@ -0,0 +1,144 @@
+# services/candle_store.py
+
+import hashlib
+import os
+import tempfile
+import zlib
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from google.api_core.exceptions import AlreadyExists
+from google.cloud import firestore
+
+from config import HISTORY_DIR, USE_FILE_STORAGE, db, logger
+from models.data_models import OhlcvFrame
+
+# Окна свечей, на которых делался анализ, хранятся один раз по хешу содержимого:
+# одинаковые окна из разных записей и у разных пользователей не дублируются.
+# Локально ссылки на окно ищутся прямо в таблице history, в Firestore у окна
+# есть счётчик ссылок `refs`.
+CANDLES_DIR = HISTORY_DIR / "candles"
+FIRESTORE_COLLECTION = "candle_windows"
+CACHE_SIZE = 64
+
+_cache: "OrderedDict[str, OhlcvFrame]" = OrderedDict()
+
+def _remember(digest: str, frame: OhlcvFrame):
+    _cache[digest] = frame
+    _cache.move_to_end(digest)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+def _encode(frame: OhlcvFrame):
+    raw = frame.to_bytes()
+    return raw, hashlib.sha256(raw).hexdigest()
+
+def put_window(frame: OhlcvFrame) -> Optional[str]:
+    """
+    Сохраняет окно свечей в сжатом виде и возвращает его sha256-адрес.
+    Если окно с таким адресом уже есть, повторно не записывается. Наличие
+    проверяется в самом хранилище: кэш служит только для чтения, окно в нём
+    могло быть удалено другим процессом.
+    """
+    raw, digest = _encode(frame)
+
+    if USE_FILE_STORAGE:
+        CANDLES_DIR.mkdir(parents=True, exist_ok=True)
+        path = CANDLES_DIR / f"{digest}.bin"
+        if not path.exists():
+            fd, tmp = tempfile.mkstemp(dir=CANDLES_DIR, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(raw, 6))
+            os.replace(tmp, path)
+    else:
+        if db is None:
+            return None
+        try:
+            db.collection(FIRESTORE_COLLECTION).document(digest).create({"data": zlib.compress(raw, 6)})
+        except AlreadyExists:
+            pass
+
+    _remember(digest, OhlcvFrame.from_bytes(raw))
+    return digest
+
+def get_window(digest: str) -> Optional[OhlcvFrame]:
+    """
+    Загружает окно свечей по адресу; None, если окна нет.
+    """
+    if digest not in _cache:
+        if USE_FILE_STORAGE:
+            path = CANDLES_DIR / f"{digest}.bin"
+            if not path.exists():
+                return None
+            blob = path.read_bytes()
+        else:
+            if db is None:
+                return None
+            doc = db.collection(FIRESTORE_COLLECTION).document(digest).get()
+            if not doc.exists:
+                return None
+            blob = doc.to_dict().get("data")
+            if blob is None:
+                return None
+        raw = zlib.decompress(blob)
+        if hashlib.sha256(raw).hexdigest() != digest:
+            logger.error(f"Окно свечей {digest} повреждено")
+            return None
+        _remember(digest, OhlcvFrame.from_bytes(raw))
+    _cache.move_to_end(digest)
+    # Срез — отдельный объект над тем же буфером, кэш не меняется снаружи
+    return _cache[digest][:]
+
+@firestore.transactional
+def _retain(transaction, doc_ref, raw: bytes):
+    snap = doc_ref.get(field_paths=["refs"], transaction=transaction)
+    if snap.exists:
+        transaction.update(doc_ref, {"refs": snap.to_dict().get("refs", 0) + 1})
+    else:
+        transaction.set(doc_ref, {"data": zlib.compress(raw, 6), "refs": 1})
+
+def retain_window(frame: OhlcvFrame) -> Optional[str]:
+    """
+    Сохраняет окно для новой записи истории и учитывает ссылку на него;
+    возвращает адрес окна. В Firestore запись окна и счётчик `refs`
+    меняются в одной транзакции, чтобы не разойтись с release_windows.
+    Локально ссылки считаются по таблице history — это просто put_window.
+    """
+    if USE_FILE_STORAGE:
+        return put_window(frame)
+    if db is None:
+        return None
+    raw, digest = _encode(frame)
+    _retain(db.transaction(), db.collection(FIRESTORE_COLLECTION).document(digest), raw)
+    _remember(digest, OhlcvFrame.from_bytes(raw))
+    return digest
+
+@firestore.transactional
+def _release(transaction, doc_ref):
+    snap = doc_ref.get(field_paths=["refs"], transaction=transaction)
+    if not snap.exists:
+        return
+    refs = snap.to_dict().get("refs", 0) - 1
+    if refs <= 0:
+        transaction.delete(doc_ref)
+    else:
+        transaction.update(doc_ref, {"refs": refs})
+
+def release_windows(digests: Iterable[str]):
+    """
+    Снимает по одной ссылке с каждого окна (только Firestore);
+    окно без ссылок удаляется.
+    """
+    if USE_FILE_STORAGE or db is None:
+        return
+    for digest in digests:
+        _release(db.transaction(), db.collection(FIRESTORE_COLLECTION).document(digest))
+        _cache.pop(digest, None)
+
+def delete_windows(digests: Iterable[str]):
+    """
+    Удаляет локальные окна, на которые больше не ссылается ни одна запись.
+    """
+    for digest in digests:
+        (CANDLES_DIR / f"{digest}.bin").unlink(missing_ok=True)
+        _cache.pop(digest, None)
@@ -2,10 +2,16 @@
 
 import os
 import httpx
-import pandas as pd
+import numpy as np
 from config import logger
+from models.data_models import OhlcvFrame
+from services.ohlcv_provider import OhlcvProvider, register_provider
 
-class CryptoCompareProvider:
+ENDPOINTS = {"m": "histominute", "h": "histohour", "d": "histoday"}
+
+@register_provider
+class CryptoCompareProvider(OhlcvProvider):
+    name = "cryptocompare"
     BASE_URL = "https://min-api.cryptocompare.com/data"
 
     def __init__(self, api_key: str = None):
@@ -14,35 +20,15 @@ class CryptoCompareProvider:
             logger.error("CRYPTOCOMPARE_API_KEY не установлен")
             raise ValueError("CRYPTOCOMPARE_API_KEY не установлен")
 
-    async def fetch_ohlcv(self, symbol: str, interval: str, limit: int) -> pd.DataFrame:
+    async def fetch_ohlcv(self, symbol: str, interval: str, limit: int) -> OhlcvFrame:
         """
         Загружает OHLCV данные из CryptoCompare.
         `symbol` — строка вида 'BTCUSDT' или 'BTCUSD'.
         `interval` — '1m', '15m', '1h', '4h', '1d' и т.д.
         `limit` — количество свечей.
         """
-        # Разбор символа
-        if symbol.endswith("USDT"):
-            fsym = symbol[:-4]
-            tsym = "USDT"
-        else:
-            fsym = symbol[:-3]
-            tsym = symbol[-3:]
-
-        # Выбираем endpoint
-        unit = interval[-1]
-        value = int(interval[:-1])
-        if unit == "m":
-            endpoint = "histominute"
-            aggregate = value
-        elif unit == "h":
-            endpoint = "histohour"
-            aggregate = value
-        elif unit == "d":
-            endpoint = "histoday"
-            aggregate = value
-        else:
-            raise ValueError(f"Unsupported interval: {interval}")
+        fsym, tsym = self.parse_symbol(symbol)
+        unit, aggregate = self.parse_interval(interval)
 
         params = {
             "fsym": fsym,
@@ -51,7 +37,7 @@ class CryptoCompareProvider:
             "aggregate": aggregate,
             "api_key": self.api_key,
         }
-        url = f"{self.BASE_URL}/{endpoint}"
+        url = f"{self.BASE_URL}/{ENDPOINTS[unit]}"
 
         async with httpx.AsyncClient(timeout=10.0) as client:
             resp = await client.get(url, params=params)
@@ -60,17 +46,12 @@ class CryptoCompareProvider:
 
         if not data:
             logger.warning("CryptoCompare вернул пустой список Data")
-            return pd.DataFrame()
-
-        # Преобразование в DataFrame
-        df = pd.DataFrame(data)
-        df["Open Time"] = pd.to_datetime(df["time"], unit="s")
-        df["Open"]   = df["open"]
-        df["High"]   = df["high"]
-        df["Low"]    = df["low"]
-        df["Close"]  = df["close"]
-        df["Volume"] = df["volumefrom"]
-        df["Quote Asset Volume"] = df["volumeto"]
-
-        # Возвращаем только нужные колонки
-        return df[["Open Time","Open","High","Low","Close","Volume","Quote Asset Volume"]]
+            return OhlcvFrame.empty_frame()
+
+        # Сразу раскладываем ответ по колонкам, минуя промежуточный DataFrame
+        time = np.fromiter((d["time"] for d in data), dtype=np.int64, count=len(data))
+        values = np.array(
+            [[d["open"], d["high"], d["low"], d["close"], d["volumefrom"], d["volumeto"]] for d in data],
+            dtype=np.float64,
+        )
+        return OhlcvFrame(time.astype("datetime64[s]"), np.ascontiguousarray(values.T))
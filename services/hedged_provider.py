@@ -0,0 +1,207 @@
+# services/hedged_provider.py
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+from config import config, logger
+from models.data_models import OhlcvFrame
+from services.ohlcv_provider import PROVIDERS, OhlcvProvider
+# Импорт регистрирует источники в PROVIDERS
+import services.crypto_compare_provider  # noqa: F401
+import services.binance_provider  # noqa: F401
+
+# Задержка хеджа, пока по источнику мало замеров
+DEFAULT_HEDGE_DELAY = float(config.get("providers", "hedge_delay", 1.0))
+MIN_HEDGE_DELAY = 0.05
+LATENCY_WINDOW = 100
+MIN_SAMPLES = 20
+FAILURE_THRESHOLD = int(config.get("providers", "failure_threshold", 3))
+RESET_TIMEOUT = float(config.get("providers", "reset_timeout", 30.0))
+
+class CircuitBreaker:
+    """
+    После `failure_threshold` сбоев подряд источник исключается из ротации
+    на `reset_timeout` секунд, затем пропускает ровно один пробный запрос
+    (half-open): остальные ждут его результата.
+    """
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """
+        Можно ли сейчас рассчитывать на источник (без захвата пробы).
+        """
+        if self.opened_at is None:
+            return True
+        return not self.probing and time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def acquire(self) -> bool:
+        """
+        Разрешение на запрос: в замкнутом состоянии — всегда,
+        в half-open — только первому, кто захватит пробу.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if not self.available():
+                return False
+            self.probing = True
+            return True
+
+    def release(self):
+        """
+        Проба завершилась без вердикта (отмена, некорректный запрос).
+        """
+        with self._lock:
+            self.probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class HedgedProvider(OhlcvProvider):
+    """
+    Опрашивает несколько источников с хеджированием: если основной не ответил
+    за p95 своей задержки, параллельно запускается следующий, и берётся первый
+    непустой ответ. Источники с разомкнутым CircuitBreaker пропускаются.
+    """
+    name = "hedged"
+
+    def __init__(self, providers: List[OhlcvProvider], hedge_delay: float = DEFAULT_HEDGE_DELAY):
+        if not providers:
+            raise ValueError("Не задано ни одного источника OHLCV")
+        self.providers = providers
+        self.hedge_delay = hedge_delay
+        self._latencies = {p.name: deque(maxlen=LATENCY_WINDOW) for p in providers}
+        self._breakers = {p.name: CircuitBreaker() for p in providers}
+
+    def delay_for(self, provider: OhlcvProvider) -> float:
+        samples = sorted(self._latencies[provider.name])
+        if len(samples) < MIN_SAMPLES:
+            return self.hedge_delay
+        return max(samples[int(0.95 * (len(samples) - 1))], MIN_HEDGE_DELAY)
+
+    async def fetch_ohlcv(self, symbol: str, interval: str, limit: int) -> OhlcvFrame:
+        candidates = [p for p in self.providers if self._breakers[p.name].available()]
+        # Все разомкнуты — лучше попробовать, чем отказать сразу
+        forced = not candidates
+        if forced:
+            candidates = list(self.providers)
+
+        pending = set()
+        last_error: Optional[Exception] = None
+        got_empty = False
+        next_idx = 0
+
+        def launch():
+            # Следующий источник, чей breaker пускает запрос; None — таких нет
+            nonlocal next_idx
+            while next_idx < len(candidates):
+                provider = candidates[next_idx]
+                next_idx += 1
+                if forced or self._breakers[provider.name].acquire():
+                    pending.add(asyncio.create_task(self._timed(provider, symbol, interval, limit)))
+                    return provider
+            return None
+
+        current = launch()
+        if current is None:
+            raise RuntimeError("Нет доступных источников OHLCV")
+        try:
+            while pending:
+                has_backup = next_idx < len(candidates)
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.delay_for(current) if has_backup else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    backup = launch()
+                    if backup is not None:
+                        logger.info(f"Хедж: {current.name} медлит, запущен {backup.name}")
+                        current = backup
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    try:
+                        frame = task.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    if not frame.empty:
+                        return frame
+                    got_empty = True
+                if not pending and next_idx < len(candidates):
+                    current = launch() or current
+        finally:
+            for task in pending:
+                task.cancel()
+            # Дожидаемся отмены, чтобы проигравшие источники записали свою задержку
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if last_error is not None and not got_empty:
+            raise last_error
+        return OhlcvFrame.empty_frame()
+
+    async def _timed(self, provider: OhlcvProvider, symbol: str, interval: str, limit: int) -> OhlcvFrame:
+        breaker = self._breakers[provider.name]
+        start = time.monotonic()
+        try:
+            frame = await provider.fetch_ohlcv(symbol, interval, limit)
+        except asyncio.CancelledError:
+            # Проигравший хедж: время до отмены — нижняя оценка его задержки.
+            # Без неё p95 видел бы только быстрые ответы и сползал вниз.
+            self._latencies[provider.name].append(time.monotonic() - start)
+            breaker.release()
+            raise
+        except ValueError:
+            breaker.release()
+            raise
+        except Exception as e:
+            breaker.record_failure()
+            logger.warning(f"Источник {provider.name} не ответил: {e}")
+            raise
+        self._latencies[provider.name].append(time.monotonic() - start)
+        breaker.record_success()
+        return frame
+
+def build_provider(names: List[str] = None) -> HedgedProvider:
+    """
+    Создаёт HedgedProvider из источников реестра в порядке `names`
+    (по умолчанию — providers.order из конфига). Источники, которые
+    не удалось инициализировать (например, нет API-ключа), пропускаются.
+    """
+    names = names or config.get("providers", "order", ["cryptocompare", "binance"])
+    providers = []
+    for name in names:
+        try:
+            providers.append(PROVIDERS[name]())
+        except Exception as e:
+            logger.error(f"Источник {name} недоступен: {e}")
+    return HedgedProvider(providers)
+
+_provider: Optional[HedgedProvider] = None
+
+def get_provider() -> HedgedProvider:
+    global _provider
+    if _provider is None:
+        _provider = build_provider()
+    return _provider
@@ -1,74 +1,237 @@
 # services/history_manager.py
 
 import json
-from pathlib import Path
+import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
+from typing import List, Optional, Tuple
 
-from config import ENV, db  # Импортируем ENV из модуля config
+from google.cloud import firestore
 
-# Выбираем файловое хранилище в локальной среде
-USE_FILE_STORAGE = ENV in ("development", "local")
+from config import HISTORY_DIR, USE_FILE_STORAGE, config, db
+from models.data_models import OhlcvFrame
+from services.candle_store import delete_windows, put_window, release_windows, retain_window
 
-# Директория для локального сохранения истории
-HISTORY_DIR = Path("history")
+# Файл базы для локального сохранения истории (SQLite)
+HISTORY_DB = HISTORY_DIR / "history.sqlite3"
 
-# Firestore-коллекция для продакшен
+# Firestore для продакшен: histories/{user_id}/entries/{entry_id}.
+# Старый формат — массив `history` в самом документе histories/{user_id}.
 FIRESTORE_COLLECTION = "histories"
-MAX_HISTORY_ITEMS = 5
+FIRESTORE_ENTRIES = "entries"
+MAX_HISTORY_ITEMS = int(config.get("history", "max_items", 500))
+PAGE_SIZE = 20
 
-def _load_local_history(user_id: str):
-    HISTORY_DIR.mkdir(exist_ok=True)
-    path = HISTORY_DIR / f"{user_id}.json"
-    if not path.exists():
-        return []
-    return json.loads(path.read_text(encoding="utf-8"))
+# Поля, которые отдаются при листинге; тяжёлый `result` читается отдельно
+META_FIELDS = ["timestamp", "symbol", "interval", "candles"]
+
+# Схема и перенос старых JSON-файлов выполняются один раз на процесс
+_schema_ready = False
+
+def _init_schema(conn: sqlite3.Connection):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS history (
+            id        INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id   TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            symbol    TEXT NOT NULL,
+            interval  TEXT NOT NULL,
+            result    TEXT NOT NULL,
+            candles   TEXT
+        );
+        CREATE INDEX IF NOT EXISTS history_user_ts ON history (user_id, timestamp DESC, id DESC);
+    """)
+    # Базы, созданные до появления ссылки на окно свечей
+    if "candles" not in {r["name"] for r in conn.execute("PRAGMA table_info(history)")}:
+        conn.execute("ALTER TABLE history ADD COLUMN candles TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS history_candles ON history (candles)")
+    _import_legacy_files(conn)
+
+def _import_legacy_files(conn: sqlite3.Connection):
+    """
+    Переносит истории старого формата (history/{user_id}.json — массив записей)
+    в SQLite и переименовывает файлы в *.json.imported. Уже перенесённые записи
+    не дублируются, если процесс упал между коммитом и переименованием.
+    """
+    imported = []
+    with conn:
+        for path in sorted(HISTORY_DIR.glob("*.json")):
+            for entry in json.loads(path.read_text(encoding="utf-8")):
+                row = (path.stem, entry["timestamp"], entry["symbol"], entry["interval"])
+                conn.execute(
+                    """INSERT INTO history (user_id, timestamp, symbol, interval, result)
+                       SELECT ?, ?, ?, ?, ? WHERE NOT EXISTS (
+                           SELECT 1 FROM history WHERE user_id = ? AND timestamp = ? AND symbol = ? AND interval = ?)""",
+                    (*row, json.dumps(entry.get("result", {}), ensure_ascii=False), *row),
+                )
+            imported.append(path)
+    for path in imported:
+        path.rename(path.with_name(path.name + ".imported"))
 
-def _save_local_history(user_id: str, history):
+@contextmanager
+def _connect():
+    global _schema_ready
     HISTORY_DIR.mkdir(exist_ok=True)
-    path = HISTORY_DIR / f"{user_id}.json"
-    path.write_text(json.dumps(history, ensure_ascii=False, indent=2), encoding="utf-8")
+    conn = sqlite3.connect(HISTORY_DB)
+    conn.row_factory = sqlite3.Row
+    try:
+        if not _schema_ready:
+            _init_schema(conn)
+            _schema_ready = True
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+def _entries(user_id: str):
+    return db.collection(FIRESTORE_COLLECTION).document(user_id).collection(FIRESTORE_ENTRIES)
+
+# Пользователи, чья история старого формата уже проверена в этом процессе
+_migrated = set()
+
+@firestore.transactional
+def _move_legacy(transaction, user_id: str):
+    parent = db.collection(FIRESTORE_COLLECTION).document(user_id)
+    snap = parent.get(field_paths=["history"], transaction=transaction)
+    legacy = snap.to_dict().get("history") if snap.exists else None
+    if not legacy:
+        return
+    for entry in legacy:
+        transaction.set(_entries(user_id).document(), entry)
+    transaction.update(parent, {"history": firestore.DELETE_FIELD})
+
+def _migrate_legacy(user_id: str):
+    """
+    Переносит массив `history` старого формата в подколлекцию entries
+    (один раз на пользователя; транзакция защищает от двойного переноса).
+    """
+    if user_id in _migrated:
+        return
+    _move_legacy(db.transaction(), user_id)
+    _migrated.add(user_id)
 
-def save_history(user_id: str, symbol: str, interval: str, result: dict):
+def _prune_firestore(user_id: str):
     """
-    Сохраняет историю запроса:
+    Удаляет только самые старые записи сверх MAX_HISTORY_ITEMS: число записей
+    берётся агрегацией count(), а не пропуском документов через offset.
+    С окон свечей удалённых записей снимаются ссылки.
+    """
+    total = _entries(user_id).count().get()[0][0].value
+    overflow = total - MAX_HISTORY_ITEMS
+    if overflow <= 0:
+        return
+    stale = (_entries(user_id)
+             .order_by("timestamp", direction=firestore.Query.ASCENDING)
+             .limit(overflow)
+             .select(["candles"])
+             .stream())
+    released = []
+    for doc in stale:
+        doc.reference.delete()
+        if doc.to_dict().get("candles"):
+            released.append(doc.to_dict()["candles"])
+    release_windows(released)
+
+def save_history(user_id: str, symbol: str, interval: str, result: dict,
+                 candles: OhlcvFrame = None) -> Optional[str]:
+    """
+    Сохраняет запрос отдельной записью:
       - timestamp (UTC YYYY-MM-DD HH:MM:SS)
       - symbol, interval, result (словарь)
-    Оставляет только последние MAX_HISTORY_ITEMS записей.
+      - candles — окно свечей анализа; кладётся в candle_store,
+        в записи остаётся его адрес
+    Оставляет только последние MAX_HISTORY_ITEMS записей пользователя.
+    Возвращает id записи.
     """
-    entry = {
-        "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+    timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+    if USE_FILE_STORAGE:
+        with _connect() as conn:
+            # Блокировка на запись сериализует сохранение окна, вставку ссылки
+            # и удаление осиротевших окон между потоками и процессами:
+            # окно не может исчезнуть между put_window и INSERT.
+            conn.execute("BEGIN IMMEDIATE")
+            digest = put_window(candles) if candles is not None else None
+            cur = conn.execute(
+                "INSERT INTO history (user_id, timestamp, symbol, interval, result, candles) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, timestamp, symbol, interval, json.dumps(result, ensure_ascii=False), digest),
+            )
+            stale = conn.execute(
+                """SELECT id, candles FROM history WHERE user_id = ? AND id NOT IN (
+                       SELECT id FROM history WHERE user_id = ?
+                       ORDER BY timestamp DESC, id DESC LIMIT ?)""",
+                (user_id, user_id, MAX_HISTORY_ITEMS),
+            ).fetchall()
+            conn.executemany("DELETE FROM history WHERE id = ?", [(r["id"],) for r in stale])
+            # Окна свечей, на которые больше не ссылается ни одна запись. Файлы
+            # удаляются до коммита, пока блокировка ещё держится; при откате
+            # записи без окна просто загрузят свечи заново.
+            delete_windows([
+                d for d in {r["candles"] for r in stale if r["candles"]}
+                if conn.execute("SELECT 1 FROM history WHERE candles = ? LIMIT 1", (d,)).fetchone() is None
+            ])
+            return str(cur.lastrowid)
+
+    if db is None:
+        return None
+    _migrate_legacy(user_id)
+    _, doc_ref = _entries(user_id).add({
+        "timestamp": timestamp,
         "symbol": symbol,
         "interval": interval,
-        "result": result
-    }
+        "result": result,
+        "candles": retain_window(candles) if candles is not None else None,
+    })
+    _prune_firestore(user_id)
+    return doc_ref.id
 
+def list_history(user_id: str, limit: int = PAGE_SIZE, cursor: str = None) -> Tuple[List[dict], Optional[str]]:
+    """
+    Возвращает страницу метаданных истории (новые — первыми) без `result`:
+    ([{'id', 'timestamp', 'symbol', 'interval', 'candles'}, ...], next_cursor).
+    `cursor` — id последней записи предыдущей страницы; next_cursor = None,
+    если страниц больше нет.
+    """
     if USE_FILE_STORAGE:
-        history = _load_local_history(user_id)
-        history.append(entry)
-        history = history[-MAX_HISTORY_ITEMS:]
-        _save_local_history(user_id, history)
+        query = "SELECT id, timestamp, symbol, interval, candles FROM history WHERE user_id = ?"
+        params = [user_id]
+        if cursor is not None:
+            query += " AND (timestamp, id) < (SELECT timestamp, id FROM history WHERE id = ? AND user_id = ?)"
+            params += [int(cursor), user_id]
+        query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+        with _connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        items = [{**dict(r), "id": str(r["id"])} for r in rows]
     else:
         if db is None:
-            return
-        doc_ref = db.collection(FIRESTORE_COLLECTION).document(user_id)
-        doc = doc_ref.get()
-        if not doc.exists:
-            doc_ref.set({"history": [entry]})
-        else:
-            hist = doc.to_dict().get("history", [])
-            hist.append(entry)
-            hist = hist[-MAX_HISTORY_ITEMS:]
-            doc_ref.update({"history": hist})
-
-def get_history(user_id: str):
+            return [], None
+        _migrate_legacy(user_id)
+        query = _entries(user_id).order_by("timestamp", direction=firestore.Query.DESCENDING).select(META_FIELDS)
+        if cursor is not None:
+            last = _entries(user_id).document(cursor).get(field_paths=["timestamp"])
+            if not last.exists:
+                return [], None
+            query = query.start_after(last)
+        items = [{"id": d.id, **d.to_dict()} for d in query.limit(limit + 1).stream()]
+
+    if len(items) > limit:
+        return items[:limit], items[limit - 1]["id"]
+    return items, None
+
+def get_history_result(user_id: str, entry_id: str) -> Optional[dict]:
     """
-    Возвращает список последних запросов пользователя (не более MAX_HISTORY_ITEMS).
+    Загружает `result` одной записи истории; None, если записи нет.
     """
     if USE_FILE_STORAGE:
-        return _load_local_history(user_id)
+        with _connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM history WHERE user_id = ? AND id = ?", (user_id, int(entry_id))
+            ).fetchone()
+        return json.loads(row["result"]) if row else None
     if db is None:
-        return []
-    doc = db.collection(FIRESTORE_COLLECTION).document(user_id).get()
+        return None
+    doc = _entries(user_id).document(entry_id).get(field_paths=["result"])
     if not doc.exists:
-        return []
-    return doc.to_dict().get("history", [])
+        return None
+    return doc.to_dict().get("result")
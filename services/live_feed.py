@@ -0,0 +1,181 @@
+# services/live_feed.py
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import config, logger
+from services.ohlcv_provider import OhlcvProvider
+
+# Сколько последних свечей запрашиваем за один опрос: текущая (формирующаяся)
+# и предыдущая — на случай, если между опросами свеча успела закрыться.
+POLL_WINDOW = 2
+POLL_INTERVAL = float(config.get("live", "poll_interval", 5.0))
+# Подписка без обращений дольше этого времени считается брошенной
+SUBSCRIPTION_TTL = float(config.get("live", "subscription_ttl", 60.0))
+# Предел догрузки пропущенных свечей; при большем разрыве график перестраивается
+MAX_BACKFILL = 500
+
+Key = Tuple[str, str]
+
+
+class LiveFeed:
+    """
+    Общий серверный источник «живых» свечей.
+
+    Для каждой пары (symbol, interval) держит последние свечи и раздаёт их всем
+    подписанным сессиям. Провайдер опрашивается одним фоновым потоком не чаще
+    раза в `poll_interval` на ключ, сколько бы зрителей ни было подписано.
+    Ключи, для которых данные приходят извне (WebSocket и т.п.) через `publish`,
+    не опрашиваются.
+    """
+
+    def __init__(self, provider=None, poll_interval: float = POLL_INTERVAL,
+                 subscription_ttl: float = SUBSCRIPTION_TTL, autostart: bool = True):
+        self._provider = provider
+        self.autostart = autostart
+        self.poll_interval = poll_interval
+        self.subscription_ttl = subscription_ttl
+        self._lock = threading.Lock()
+        self._candles: Dict[Key, List[dict]] = {}
+        self._leases: Dict[Key, float] = {}
+        self._pushed: set = set()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def provider(self):
+        if self._provider is None:
+            from services.hedged_provider import get_provider
+            self._provider = get_provider()
+        return self._provider
+
+    def subscribe(self, symbol: str, interval: str):
+        """
+        Регистрирует (или продлевает) подписку на пару и запускает опрос.
+        """
+        with self._lock:
+            self._leases[(symbol, interval)] = time.monotonic()
+        if self.autostart:
+            self._ensure_running()
+
+    def publish(self, symbol: str, interval: str, records: List[dict]):
+        """
+        Принимает свечи от push-источника. Записи — в формате
+        `OhlcvFrame.to_records()`.
+        """
+        key = (symbol, interval)
+        with self._lock:
+            self._pushed.add(key)
+            self._merge(key, records)
+
+    def since(self, symbol: str, interval: str, last_time: Optional[str]) -> List[dict]:
+        """
+        Возвращает свечи, начиная с `last_time` включительно: первая запись —
+        обновлённая последняя свеча клиента, остальные — новые.
+        Заодно продлевает подписку.
+        """
+        self.subscribe(symbol, interval)
+        with self._lock:
+            candles = list(self._candles.get((symbol, interval), []))
+        if last_time is None:
+            return candles
+        return [c for c in candles if _time_key(c) >= last_time]
+
+    async def fetch_since(self, symbol: str, interval: str, last_time: str) -> Optional[List[dict]]:
+        """
+        Как `since`, но если последняя свеча клиента уже вытеснена из кэша
+        (долгий анализ, спящая вкладка, поздняя подписка), догружает пропущенный
+        участок у провайдера. None — разрыв закрыть не удалось, нужна полная
+        перерисовка.
+        """
+        candles = self.since(symbol, interval, last_time)
+        if not candles or candles[0]["Open Time"] == last_time:
+            return candles
+
+        step = OhlcvProvider.interval_seconds(interval)
+        elapsed = (datetime.utcnow() - datetime.fromisoformat(last_time)).total_seconds()
+        limit = int(elapsed // step) + POLL_WINDOW
+        if limit > MAX_BACKFILL:
+            return None
+        try:
+            frame = await self.provider.fetch_ohlcv(symbol, interval, limit)
+        except Exception as e:
+            logger.warning(f"Догрузка {symbol} {interval} не удалась: {e}")
+            return None
+        records = [r for r in frame.to_records() if r["Open Time"] >= last_time]
+        if not records or records[0]["Open Time"] != last_time:
+            return None
+        # Свежие свечи фида важнее догруженных
+        merged = {r["Open Time"]: r for r in records}
+        merged.update((c["Open Time"], c) for c in candles)
+        return [merged[t] for t in sorted(merged)]
+
+    def stop(self):
+        self._stop.set()
+
+    def _merge(self, key: Key, records: List[dict]):
+        merged = {_time_key(c): c for c in self._candles.get(key, [])}
+        for rec in records:
+            t = _time_key(rec)
+            merged[t] = {**rec, "Open Time": t}
+        self._candles[key] = [merged[t] for t in sorted(merged)][-POLL_WINDOW:]
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        asyncio.run(self._loop())
+
+    async def _loop(self):
+        while not self._stop.is_set():
+            if not await self.poll_once():
+                break
+            await asyncio.sleep(self.poll_interval)
+        with self._lock:
+            self._thread = None
+
+    async def poll_once(self) -> bool:
+        """
+        Один цикл опроса: снимает просроченные подписки и по одному разу
+        опрашивает каждый ключ без push-источника. False — подписок не осталось.
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, t in self._leases.items() if now - t > self.subscription_ttl]
+            for key in expired:
+                del self._leases[key]
+                self._candles.pop(key, None)
+                self._pushed.discard(key)
+            keys = [k for k in self._leases if k not in self._pushed]
+            if not self._leases:
+                return False
+        await asyncio.gather(*(self._poll(k) for k in keys))
+        return True
+
+    async def _poll(self, key: Key):
+        symbol, interval = key
+        try:
+            frame = await self.provider.fetch_ohlcv(symbol, interval, POLL_WINDOW)
+        except Exception as e:
+            logger.warning(f"Live-опрос {symbol} {interval} не удался: {e}")
+            return
+        if frame.empty:
+            return
+        with self._lock:
+            self._merge(key, frame.to_records())
+
+
+def _time_key(record: dict) -> str:
+    t = record["Open Time"]
+    return t if isinstance(t, str) else t.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+feed = LiveFeed()
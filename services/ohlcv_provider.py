@@ -0,0 +1,60 @@
+# services/ohlcv_provider.py
+
+from typing import Dict, Tuple, Type
+
+from models.data_models import OhlcvFrame
+
+UNIT_SECONDS = {"m": 60, "h": 3600, "d": 86400}
+
+# Реестр взаимозаменяемых источников OHLCV: имя -> класс
+PROVIDERS: Dict[str, Type["OhlcvProvider"]] = {}
+
+def register_provider(cls):
+    """
+    Декоратор: регистрирует класс источника в PROVIDERS под его `name`.
+    """
+    PROVIDERS[cls.name] = cls
+    return cls
+
+class OhlcvProvider:
+    """
+    Базовый интерфейс источника свечей.
+
+    ValueError означает некорректный запрос (символ/интервал не поддерживается),
+    любые другие исключения — сбой самого источника.
+    """
+    name = "base"
+
+    async def fetch_ohlcv(self, symbol: str, interval: str, limit: int) -> OhlcvFrame:
+        raise NotImplementedError
+
+    @staticmethod
+    def parse_symbol(symbol: str) -> Tuple[str, str]:
+        """
+        'BTCUSDT' -> ('BTC', 'USDT'), 'BTCUSD' -> ('BTC', 'USD').
+        """
+        if symbol.endswith("USDT"):
+            return symbol[:-4], "USDT"
+        return symbol[:-3], symbol[-3:]
+
+    @staticmethod
+    def parse_interval(interval: str) -> Tuple[str, int]:
+        """
+        '15m' -> ('m', 15), '4h' -> ('h', 4), '1d' -> ('d', 1).
+        """
+        unit = interval[-1:]
+        try:
+            value = int(interval[:-1])
+        except ValueError:
+            raise ValueError(f"Unsupported interval: {interval}") from None
+        if unit not in ("m", "h", "d") or value <= 0:
+            raise ValueError(f"Unsupported interval: {interval}")
+        return unit, value
+
+    @classmethod
+    def interval_seconds(cls, interval: str) -> int:
+        """
+        '15m' -> 900, '4h' -> 14400.
+        """
+        unit, value = cls.parse_interval(interval)
+        return UNIT_SECONDS[unit] * value
@@ -12,9 +12,10 @@ logger = logging.getLogger(__name__)
 openai.api_key = os.getenv("OPENAI_API_KEY")
 MODEL_NAME = config.get("openai", "model", "gpt-4o-mini")
 
-async def ask(prompt: str) -> dict:
+async def ask(prompt: str, max_tokens: int = 15000) -> dict:
     """
     Отправляет prompt в OpenAI ChatCompletion и пытается вернуть распарсенный JSON.
+    `max_tokens` ограничивает длину ответа (для секционных запросов — меньше).
     В случае ошибки парсинга вернёт {'error': ..., 'raw': <строка ответа>}.
     """
     if not openai.api_key:
@@ -29,7 +30,7 @@ async def ask(prompt: str) -> dict:
                 {"role": "user",   "content": prompt}
             ],
             temperature=0.1,
-            max_tokens=15000,
+            max_tokens=max_tokens,
             top_p=1.0,
             frequency_penalty=0.0,
             presence_penalty=0.1,
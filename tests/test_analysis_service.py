@@ -0,0 +1,60 @@
+# tests/test_analysis_service.py
+
+import asyncio
+
+import pytest
+
+from services import analysis_service
+from services.analysis_service import analyze_sections, group_max_tokens
+
+RECORDS = [{"Open Time": "2024-01-01T00:00:00", "Open": 1.0, "High": 2.0, "Low": 0.5,
+            "Close": 1.5, "Volume": 10.0, "Quote Asset Volume": 15.0}]
+
+@pytest.fixture
+def fake_ask(monkeypatch):
+    """
+    Подменяет вызов LLM: отвечает на все запрошенные секции, кроме `omit`.
+    """
+    calls = []
+    omit = set()
+
+    async def ask(prompt, max_tokens=15000):
+        requested = [s for s in analysis_service.SECTION_TO_GROUP if f" {s}," in prompt or f" {s}." in prompt]
+        calls.append((requested, max_tokens))
+        return {s: f"ok {s}" for s in requested if s not in omit}
+
+    monkeypatch.setattr(analysis_service, "ask", ask)
+    monkeypatch.setattr(analysis_service, "save_snapshot", lambda *a: None)
+    analysis_service._section_cache.clear()
+    return calls, omit
+
+def test_groups_are_requested_separately_with_scaled_budget(fake_ask):
+    calls, _ = fake_ask
+    result, failed = asyncio.run(analyze_sections("u", RECORDS, ["RSI", "MACD", "recommendations"]))
+
+    assert result == {"RSI": "ok RSI", "MACD": "ok MACD", "recommendations": "ok recommendations"}
+    assert failed == []
+    assert sorted(calls) == [(["RSI", "MACD"], group_max_tokens(2)), (["recommendations"], group_max_tokens(1))]
+
+def test_budget_grows_with_section_count():
+    assert group_max_tokens(17) > group_max_tokens(2)
+    assert group_max_tokens(100) == analysis_service.MAX_GROUP_TOKENS
+
+def test_cached_sections_are_not_requested_again(fake_ask):
+    calls, _ = fake_ask
+    asyncio.run(analyze_sections("u", RECORDS, ["RSI"]))
+    result, _ = asyncio.run(analyze_sections("u", RECORDS, ["RSI"]))
+
+    assert result == {"RSI": "ok RSI"}
+    assert len(calls) == 1
+
+def test_omitted_section_is_reported_and_not_requeried(fake_ask):
+    calls, omit = fake_ask
+    omit.add("ADX")
+
+    for _ in range(3):
+        result, failed = asyncio.run(analyze_sections("u", RECORDS, ["ADX"]))
+        assert result == {}
+        assert failed == ["ADX"]
+
+    assert len(calls) == 1
@@ -0,0 +1,90 @@
+# tests/test_data_models.py
+
+import numpy as np
+import pytest
+
+from models.data_models import COLUMNS, OhlcvFrame
+
+def _records(n: int) -> list:
+    return [{"Open Time": f"2024-01-01T{i:02d}:00:00", "Open": float(i), "High": i + 1.0,
+             "Low": i - 1.0, "Close": i + 0.5, "Volume": 10.0 * i, "Quote Asset Volume": 15.0 * i}
+            for i in range(n)]
+
+def test_records_roundtrip():
+    records = _records(3)
+    frame = OhlcvFrame.from_records(records)
+
+    assert len(frame) == 3
+    assert frame.to_records() == records
+    assert frame.open_time(-1).isoformat() == "2024-01-01T02:00:00"
+
+def test_columns_roundtrip():
+    frame = OhlcvFrame.from_records(_records(3))
+    columns = frame.to_columns()
+
+    assert list(columns) == list(COLUMNS)
+    assert columns["Close"] == [0.5, 1.5, 2.5]
+    assert OhlcvFrame.from_columns(columns).to_records() == frame.to_records()
+
+def test_bytes_roundtrip():
+    frame = OhlcvFrame.from_records(_records(4))
+
+    assert OhlcvFrame.from_bytes(frame.to_bytes()).to_records() == frame.to_records()
+
+def test_empty_frame():
+    frame = OhlcvFrame.from_records([])
+
+    assert frame.empty and len(frame) == 0
+    assert frame.to_records() == []
+    assert OhlcvFrame.from_columns(frame.to_columns()).empty
+
+def test_columns_and_slices_are_views():
+    frame = OhlcvFrame.from_records(_records(5))
+    part = frame[1:3]
+
+    assert np.shares_memory(frame["Close"], part["Close"])
+    assert part.to_records() == _records(5)[1:3]
+
+def test_slice_with_step_and_unknown_column_are_rejected():
+    frame = OhlcvFrame.from_records(_records(3))
+
+    with pytest.raises(ValueError):
+        frame[::2]
+    with pytest.raises(KeyError):
+        frame["RSI"]
+
+def test_append_to_slice_does_not_touch_parent():
+    frame = OhlcvFrame.from_records(_records(5))
+    part = frame[:2]
+
+    part.append(OhlcvFrame.from_records(_records(5)[4:]))
+
+    assert not np.shares_memory(frame["Close"], part["Close"])
+    assert part.to_records() == _records(5)[:2] + _records(5)[4:]
+    assert frame.to_records() == _records(5)
+
+def test_append_reuses_spare_capacity():
+    frame = OhlcvFrame.from_records(_records(2))
+    frame.append(OhlcvFrame.from_records(_records(3)[2:]))
+    buffer = frame["Close"].base
+
+    frame.append(OhlcvFrame.from_records(_records(4)[3:]))
+
+    assert frame["Close"].base is buffer
+    assert frame.to_records() == _records(4)
+
+def test_append_to_read_only_buffer_reallocates():
+    frame = OhlcvFrame.from_bytes(OhlcvFrame.from_records(_records(2)).to_bytes())
+    assert not frame["Close"].flags.writeable
+
+    frame.append(OhlcvFrame.from_records(_records(3)[2:]))
+
+    assert frame.to_records() == _records(3)
+
+def test_to_pandas_is_zero_copy():
+    frame = OhlcvFrame.from_records(_records(3))
+    df = frame.to_pandas()
+
+    assert list(df.columns) == list(COLUMNS)
+    assert np.shares_memory(df["Close"].to_numpy(), frame["Close"])
+    assert df["Open Time"].iloc[-1].isoformat() == "2024-01-01T02:00:00"
@@ -0,0 +1,129 @@
+# tests/test_hedged_provider.py
+
+import asyncio
+import time
+
+import pytest
+
+from models.data_models import OhlcvFrame
+from services.hedged_provider import HedgedProvider
+from services.ohlcv_provider import OhlcvProvider
+
+RECORDS = [{"Open Time": "2024-01-01T00:00:00", "Open": 1.0, "High": 2.0, "Low": 0.5,
+            "Close": 1.5, "Volume": 10.0, "Quote Asset Volume": 15.0}]
+
+class StubProvider(OhlcvProvider):
+    """
+    Локальная замена источника: отвечает через `delay` секунд свечами,
+    пустым фреймом или исключением `error`.
+    """
+
+    def __init__(self, name, delay=0.0, error=None, empty=False):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.empty = empty
+        self.calls = 0
+
+    async def fetch_ohlcv(self, symbol, interval, limit):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return OhlcvFrame.empty_frame() if self.empty else OhlcvFrame.from_records(RECORDS)
+
+def test_hedge_fires_after_delay():
+    slow, fast = StubProvider("slow", delay=2.0), StubProvider("fast", delay=0.01)
+    hedged = HedgedProvider([slow, fast], hedge_delay=0.1)
+
+    start = time.monotonic()
+    frame = asyncio.run(hedged.fetch_ohlcv("BTCUSDT", "4h", 1))
+
+    assert len(frame) == 1
+    assert time.monotonic() - start < 1.0
+    assert fast.calls == 1
+
+def test_cancelled_primary_records_its_latency():
+    slow, fast = StubProvider("slow", delay=2.0), StubProvider("fast", delay=0.01)
+    hedged = HedgedProvider([slow, fast], hedge_delay=0.1)
+
+    asyncio.run(hedged.fetch_ohlcv("BTCUSDT", "4h", 1))
+
+    assert len(hedged._latencies["slow"]) == 1
+    assert hedged._latencies["slow"][0] >= 0.1
+
+def test_no_hedge_when_primary_is_fast():
+    primary, backup = StubProvider("primary"), StubProvider("backup")
+    hedged = HedgedProvider([primary, backup], hedge_delay=0.5)
+
+    asyncio.run(hedged.fetch_ohlcv("BTCUSDT", "4h", 1))
+
+    assert backup.calls == 0
+
+def test_empty_answer_falls_through_to_next_source():
+    empty, full = StubProvider("empty", empty=True), StubProvider("full")
+    hedged = HedgedProvider([empty, full], hedge_delay=5.0)
+
+    assert len(asyncio.run(hedged.fetch_ohlcv("BTCUSDT", "4h", 1))) == 1
+
+def test_breaker_opens_after_three_failures():
+    bad, good = StubProvider("bad", error=RuntimeError("down")), StubProvider("good")
+    hedged = HedgedProvider([bad, good], hedge_delay=5.0)
+
+    for _ in range(5):
+        assert len(asyncio.run(hedged.fetch_ohlcv("BTCUSDT", "4h", 1))) == 1
+
+    assert bad.calls == 3
+    assert good.calls == 5
+
+def test_half_open_breaker_lets_one_probe_through():
+    probe, good = StubProvider("probe", delay=0.2), StubProvider("good")
+    hedged = HedgedProvider([probe, good], hedge_delay=5.0)
+    breaker = hedged._breakers["probe"]
+    breaker.failures, breaker.opened_at = 3, time.monotonic() - breaker.reset_timeout
+
+    async def burst():
+        return await asyncio.gather(*(hedged.fetch_ohlcv("BTCUSDT", "4h", 1) for _ in range(3)))
+
+    assert all(len(frame) == 1 for frame in asyncio.run(burst()))
+    assert probe.calls == 1
+    assert good.calls == 2
+    assert breaker.opened_at is None
+
+def test_value_error_propagates_without_tripping_breaker():
+    bad = StubProvider("bad", error=ValueError("Unsupported interval: 7x"))
+    hedged = HedgedProvider([bad], hedge_delay=5.0)
+
+    for _ in range(4):
+        with pytest.raises(ValueError):
+            asyncio.run(hedged.fetch_ohlcv("BTCUSDT", "7x", 1))
+
+    assert bad.calls == 4
+
+def test_source_failure_is_raised_when_all_sources_fail():
+    hedged = HedgedProvider([StubProvider("a", error=RuntimeError("down"))], hedge_delay=5.0)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(hedged.fetch_ohlcv("BTCUSDT", "4h", 1))
+
+@pytest.mark.parametrize("symbol, expected", [
+    ("BTCUSDT", ("BTC", "USDT")),
+    ("BTCUSD", ("BTC", "USD")),
+    ("ETHBTC", ("ETH", "BTC")),
+])
+def test_parse_symbol(symbol, expected):
+    assert OhlcvProvider.parse_symbol(symbol) == expected
+
+@pytest.mark.parametrize("interval, expected", [
+    ("1m", ("m", 1)),
+    ("15m", ("m", 15)),
+    ("4h", ("h", 4)),
+    ("1d", ("d", 1)),
+])
+def test_parse_interval(interval, expected):
+    assert OhlcvProvider.parse_interval(interval) == expected
+
+@pytest.mark.parametrize("interval", ["4w", "h", "0h", "xh", ""])
+def test_parse_interval_rejects_unsupported(interval):
+    with pytest.raises(ValueError):
+        OhlcvProvider.parse_interval(interval)
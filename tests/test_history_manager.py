@@ -0,0 +1,106 @@
+# tests/test_history_manager.py
+
+import json
+
+import numpy as np
+import pytest
+
+from models.data_models import OhlcvFrame
+from services import candle_store, history_manager
+
+@pytest.fixture
+def local_store(tmp_path, monkeypatch):
+    """
+    Локальное хранилище истории и окон свечей во временной директории.
+    """
+    monkeypatch.setattr(history_manager, "USE_FILE_STORAGE", True)
+    monkeypatch.setattr(history_manager, "HISTORY_DIR", tmp_path)
+    monkeypatch.setattr(history_manager, "HISTORY_DB", tmp_path / "history.sqlite3")
+    monkeypatch.setattr(history_manager, "MAX_HISTORY_ITEMS", 2)
+    monkeypatch.setattr(history_manager, "_schema_ready", False)
+    monkeypatch.setattr(candle_store, "USE_FILE_STORAGE", True)
+    monkeypatch.setattr(candle_store, "CANDLES_DIR", tmp_path / "candles")
+    candle_store._cache.clear()
+    return tmp_path / "candles"
+
+def _frame(seed: int) -> OhlcvFrame:
+    time = (np.arange(4, dtype=np.int64) * 3600 + seed).astype("datetime64[s]")
+    return OhlcvFrame(time, np.full((6, 4), float(seed)))
+
+def test_listing_is_paginated_and_result_loaded_on_demand(local_store):
+    ids = [history_manager.save_history("u", "BTCUSDT", "4h", {"n": i}) for i in range(2)]
+
+    page, cursor = history_manager.list_history("u", limit=1)
+    assert [p["id"] for p in page] == [ids[1]]
+    assert "result" not in page[0]
+    page, cursor = history_manager.list_history("u", limit=1, cursor=cursor)
+    assert [p["id"] for p in page] == [ids[0]] and cursor is None
+
+    assert history_manager.get_history_result("u", ids[0]) == {"n": 0}
+
+def test_cursor_of_another_user_is_ignored(local_store):
+    mine = history_manager.save_history("u", "BTCUSDT", "4h", {})
+    foreign = history_manager.save_history("other", "BTCUSDT", "4h", {})
+
+    assert history_manager.list_history("u", cursor=foreign) == ([], None)
+    assert history_manager.list_history("u", cursor=mine) == ([], None)
+
+def test_legacy_json_history_is_imported_once(local_store, tmp_path):
+    legacy = [{"timestamp": "2024-01-01 00:00:00", "symbol": "ETHUSDT", "interval": "1h", "result": {"n": 1}}]
+    (tmp_path / "u.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    page, _ = history_manager.list_history("u")
+    assert [(p["symbol"], p["timestamp"]) for p in page] == [("ETHUSDT", "2024-01-01 00:00:00")]
+    assert history_manager.get_history_result("u", page[0]["id"]) == {"n": 1}
+    assert not (tmp_path / "u.json").exists()
+    assert (tmp_path / "u.json.imported").exists()
+
+    # Повторный запуск процесса не дублирует записи
+    history_manager._schema_ready = False
+    assert len(history_manager.list_history("u")[0]) == 1
+
+def test_schema_is_initialized_once_per_process(local_store, monkeypatch):
+    calls = []
+    init = history_manager._init_schema
+    monkeypatch.setattr(history_manager, "_init_schema", lambda conn: calls.append(1) or init(conn))
+
+    for i in range(3):
+        history_manager.save_history("u", "BTCUSDT", "4h", {"n": i})
+    history_manager.list_history("u")
+
+    assert calls == [1]
+
+def test_window_is_shared_and_roundtrips(local_store):
+    frame = _frame(1)
+    digest = candle_store.put_window(frame)
+    assert candle_store.put_window(OhlcvFrame.from_records(frame.to_records())) == digest
+    assert len(list(local_store.iterdir())) == 1
+
+    candle_store._cache.clear()
+    assert candle_store.get_window(digest).to_records() == frame.to_records()
+
+def test_pruned_entries_release_unreferenced_windows(local_store):
+    shared, old = _frame(1), _frame(2)
+    history_manager.save_history("u", "BTCUSDT", "4h", {}, candles=old)
+    history_manager.save_history("u", "BTCUSDT", "4h", {}, candles=shared)
+    history_manager.save_history("other", "BTCUSDT", "4h", {}, candles=shared)
+
+    # Ещё две записи у "u" вытесняют обе старые
+    history_manager.save_history("u", "BTCUSDT", "4h", {})
+    history_manager.save_history("u", "BTCUSDT", "4h", {})
+
+    remaining = {p.stem for p in local_store.glob("*.bin")}
+    assert remaining == {candle_store._encode(shared)[1]}
+    assert candle_store.get_window(candle_store._encode(old)[1]) is None
+
+def test_window_deleted_elsewhere_is_rewritten_on_save(local_store):
+    frame = _frame(1)
+    digest = candle_store.put_window(frame)
+    # Окно осталось в кэше, но файл удалён, например, другим процессом
+    (local_store / f"{digest}.bin").unlink()
+
+    entry_id = history_manager.save_history("u", "BTCUSDT", "4h", {}, candles=frame)
+
+    page, _ = history_manager.list_history("u")
+    assert page[0]["id"] == entry_id and page[0]["candles"] == digest
+    assert (local_store / f"{digest}.bin").exists()
@@ -0,0 +1,94 @@
+# tests/test_live_feed.py
+
+import asyncio
+from datetime import datetime, timedelta
+
+from models.data_models import OhlcvFrame
+from services import live_feed
+from services.live_feed import LiveFeed
+
+def _record(t: str, close: float) -> dict:
+    return {"Open Time": t, "Open": 1.0, "High": 2.0, "Low": 0.5, "Close": close,
+            "Volume": 10.0, "Quote Asset Volume": 15.0}
+
+class StubProvider:
+    """
+    Локальная замена провайдера: отдаёт заранее заданные свечи и считает вызовы.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        self.calls = []
+
+    async def fetch_ohlcv(self, symbol, interval, limit):
+        self.calls.append((symbol, interval, limit))
+        return OhlcvFrame.from_records(self.records[-limit:])
+
+def test_subscribers_share_one_poll_per_key():
+    provider = StubProvider([_record("2024-01-01T00:00:00", 1.5)])
+    feed = LiveFeed(provider, autostart=False)
+    feed.subscribe("BTCUSDT", "4h")
+    feed.subscribe("BTCUSDT", "4h")
+    feed.subscribe("ETHUSDT", "4h")
+
+    asyncio.run(feed.poll_once())
+
+    assert sorted(c[0] for c in provider.calls) == ["BTCUSDT", "ETHUSDT"]
+    assert feed.since("BTCUSDT", "4h", None)[0]["Close"] == 1.5
+
+def test_published_keys_are_not_polled():
+    provider = StubProvider([_record("2024-01-01T00:00:00", 1.5)])
+    feed = LiveFeed(provider, autostart=False)
+    feed.subscribe("BTCUSDT", "1m")
+    feed.publish("BTCUSDT", "1m", [_record("2024-01-01T00:00:00", 3.0)])
+
+    asyncio.run(feed.poll_once())
+
+    assert provider.calls == []
+    assert feed.since("BTCUSDT", "1m", None)[0]["Close"] == 3.0
+
+def test_since_replaces_last_candle_and_appends_new():
+    feed = LiveFeed(StubProvider([]), autostart=False)
+    feed.publish("BTCUSDT", "1m", [_record("2024-01-01T00:00:00", 1.0)])
+    feed.publish("BTCUSDT", "1m", [_record("2024-01-01T00:00:00", 1.2),
+                                   _record("2024-01-01T00:01:00", 1.3)])
+
+    updates = feed.since("BTCUSDT", "1m", "2024-01-01T00:00:00")
+
+    assert [(u["Open Time"], u["Close"]) for u in updates] == [
+        ("2024-01-01T00:00:00", 1.2),
+        ("2024-01-01T00:01:00", 1.3),
+    ]
+    assert feed.since("BTCUSDT", "1m", "2024-01-01T00:01:00") == updates[1:]
+
+def test_fetch_since_backfills_gap_from_provider():
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    times = [(now - timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%S") for i in range(4, -1, -1)]
+    provider = StubProvider([_record(t, float(i)) for i, t in enumerate(times)])
+    feed = LiveFeed(provider, autostart=False)
+    # В кэше фида только две последние свечи, у клиента последняя — times[1]
+    feed.publish("BTCUSDT", "1m", [_record(times[3], 30.0), _record(times[4], 40.0)])
+
+    updates = asyncio.run(feed.fetch_since("BTCUSDT", "1m", times[1]))
+
+    assert [u["Open Time"] for u in updates] == times[1:]
+    assert [u["Close"] for u in updates] == [1.0, 2.0, 30.0, 40.0]
+
+def test_fetch_since_requests_rebuild_for_unbridgeable_gap():
+    feed = LiveFeed(StubProvider([]), autostart=False)
+    feed.publish("BTCUSDT", "1m", [_record("2024-01-01T00:10:00", 1.0)])
+
+    assert asyncio.run(feed.fetch_since("BTCUSDT", "1m", "2024-01-01T00:00:00")) is None
+
+def test_subscription_expires_after_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(live_feed.time, "monotonic", lambda: clock[0])
+    provider = StubProvider([_record("2024-01-01T00:00:00", 1.5)])
+    feed = LiveFeed(provider, subscription_ttl=60, autostart=False)
+    feed.subscribe("BTCUSDT", "4h")
+    assert asyncio.run(feed.poll_once()) is True
+
+    clock[0] += 61
+    assert asyncio.run(feed.poll_once()) is False
+    assert len(provider.calls) == 1
+    assert feed._candles == {}
@@ -0,0 +1,77 @@
+# tests/test_live_patch.py
+
+import json
+
+import plotly.io as pio
+
+from models.data_models import OhlcvFrame
+from visualization.live import CANDLE_FIELDS, candle_patch, candle_replacement, store_patch
+from visualization.visualizer import create_chart
+
+def _record(t: str, close: float) -> dict:
+    return {"Open Time": t, "Open": 1.0, "High": 2.0, "Low": 0.5, "Close": close,
+            "Volume": 10.0, "Quote Asset Volume": 15.0}
+
+RECORDS = [_record("2024-01-01T00:00:00", 1.5), _record("2024-01-01T04:00:00", 1.6)]
+
+def _serialized_figure():
+    """
+    Фигура в том виде, в каком Dash отправляет её в браузер.
+    """
+    fig = create_chart([], OhlcvFrame.from_records(RECORDS), {})
+    return json.loads(pio.to_json(fig))
+
+def _apply(figure, patch):
+    """
+    Применяет операции Patch так же строго, как их понимает браузер:
+    Append и Assign по индексу допустимы только для настоящих JSON-массивов.
+    """
+    for op in patch.to_plotly_json()["operations"]:
+        *path, last = op["location"]
+        target = figure
+        for key in path:
+            target = target[key]
+        value = op["params"]["value"]
+        if op["operation"] == "Append":
+            assert isinstance(target[last], list), f"{op['location']} не массив"
+            target[last].append(value)
+        elif op["operation"] == "Assign":
+            if isinstance(last, int):
+                assert isinstance(target, list) and 0 <= last < len(target), f"{op['location']} вне массива"
+            target[last] = value
+        else:
+            raise AssertionError(f"Неожиданная операция {op['operation']}")
+    return figure
+
+def test_candle_trace_is_serialized_as_plain_arrays():
+    trace = _serialized_figure()["data"][0]
+    for field in CANDLE_FIELDS:
+        assert isinstance(trace[field], list)
+    assert trace["x"] == [r["Open Time"] for r in RECORDS]
+
+def test_patch_replaces_last_candle_and_appends_new_one():
+    updates = [_record("2024-01-01T04:00:00", 1.7), _record("2024-01-01T08:00:00", 1.8)]
+    patch, length = candle_patch(updates, "2024-01-01T04:00:00", len(RECORDS))
+
+    trace = _apply(_serialized_figure(), patch)["data"][0]
+
+    assert length == 3
+    assert trace["x"] == ["2024-01-01T00:00:00", "2024-01-01T04:00:00", "2024-01-01T08:00:00"]
+    assert trace["close"] == [1.5, 1.7, 1.8]
+    assert {len(trace[f]) for f in CANDLE_FIELDS} == {3}
+
+def test_replacement_rewrites_whole_series():
+    fresh = [_record("2024-02-01T00:00:00", 2.0)]
+
+    trace = _apply(_serialized_figure(), candle_replacement(fresh))["data"][0]
+
+    assert trace["x"] == ["2024-02-01T00:00:00"]
+    assert trace["close"] == [2.0]
+
+def test_store_patch_keeps_columnar_store_aligned():
+    store = OhlcvFrame.from_records(RECORDS).to_columns()
+    updates = [_record("2024-01-01T04:00:00", 1.7), _record("2024-01-01T08:00:00", 1.8)]
+
+    store = _apply(store, store_patch(updates, "2024-01-01T04:00:00", len(RECORDS)))
+
+    assert OhlcvFrame.from_columns(store).to_records() == [RECORDS[0]] + updates
@@ -1,15 +1,18 @@
 # visualization/handlers.py
 
+import numpy as np
 import plotly.graph_objects as go
 from visualization.config import VISUAL_CONFIG
 
 def base_candlestick(fig, df, **kwargs):
+    # Обычные списки, а не NumPy: plotly кодирует массивы как base64 (bdata),
+    # а live-режим правит эти поля через dash.Patch как JSON-массивы
     fig.add_trace(go.Candlestick(
-        x=df['Open Time'],
-        open=df['Open'],
-        high=df['High'],
-        low=df['Low'],
-        close=df['Close'],
+        x=np.datetime_as_string(df['Open Time'], unit='s').tolist(),
+        open=df['Open'].tolist(),
+        high=df['High'].tolist(),
+        low=df['Low'].tolist(),
+        close=df['Close'].tolist(),
         name='OHLC'
     ), row=1, col=1)
 
@@ -83,14 +86,14 @@ def add_support_resistance(fig, df, analysis_data, **kwargs):
     levels = analysis_data.get('support_resistance_levels', {})
     for sup in levels.get('supports', []):
         fig.add_trace(go.Scatter(
-            x=[sup['date'], df['Open Time'].iloc[-1]],
+            x=[sup['date'], df.open_time(-1)],
             y=[sup['level'], sup['level']],
             mode='lines', line=dict(color=c['support'], **VISUAL_CONFIG['line_styles']['support']),
             showlegend=False
         ), row=1, col=1)
     for res in levels.get('resistances', []):
         fig.add_trace(go.Scatter(
-            x=[res['date'], df['Open Time'].iloc[-1]],
+            x=[res['date'], df.open_time(-1)],
             y=[res['level'], res['level']],
             mode='lines', line=dict(color=c['resistance'], **VISUAL_CONFIG['line_styles']['resistance']),
             showlegend=False
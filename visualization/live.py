@@ -0,0 +1,47 @@
+# visualization/live.py
+
+from dash import Patch
+
+from models.data_models import COLUMNS
+
+# Поля свечной трассы (data[0]) и соответствующие колонки свечей
+CANDLE_FIELDS = {'x': 'Open Time', 'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close'}
+
+def _patch_columns(target, fields, updates, last_time, length):
+    """
+    Запись с `last_time` заменяет последний элемент каждого массива по индексу
+    (отрицательные индексы Patch не поддерживает), остальные дописываются в конец.
+    """
+    for rec in updates:
+        if rec['Open Time'] == last_time:
+            for field, column in fields.items():
+                target[field][length - 1] = rec[column]
+        else:
+            for field, column in fields.items():
+                target[field].append(rec[column])
+            length += 1
+    return length
+
+def candle_patch(updates, last_time, length):
+    """
+    Patch свечной трассы (data[0]). Возвращает (Patch, новая длина).
+    """
+    fig = Patch()
+    return fig, _patch_columns(fig['data'][0], CANDLE_FIELDS, updates, last_time, length)
+
+def store_patch(updates, last_time, length):
+    """
+    Patch колоночного stored-data (`OhlcvFrame.to_columns()`).
+    """
+    data = Patch()
+    _patch_columns(data, {c: c for c in COLUMNS}, updates, last_time, length)
+    return data
+
+def candle_replacement(records):
+    """
+    Patch, подменяющий свечную трассу целиком.
+    """
+    fig = Patch()
+    for field, column in CANDLE_FIELDS.items():
+        fig['data'][0][field] = [r[column] for r in records]
+    return fig